@@ -0,0 +1,31 @@
+"""Static list of the packages shipped by the ``aesara`` distribution.
+
+Generated by ``tools/gen_packages.py``; do not edit by hand.
+"""
+
+PACKAGES = [
+    "aesara",
+    "aesara.compile",
+    "aesara.compile.function",
+    "aesara.d3viz",
+    "aesara.gpuarray",
+    "aesara.graph",
+    "aesara.link",
+    "aesara.link.c",
+    "aesara.link.jax",
+    "aesara.link.numba",
+    "aesara.link.numba.dispatch",
+    "aesara.misc",
+    "aesara.sandbox",
+    "aesara.sandbox.linalg",
+    "aesara.scalar",
+    "aesara.scan",
+    "aesara.sparse",
+    "aesara.sparse.sandbox",
+    "aesara.tensor",
+    "aesara.tensor.nnet",
+    "aesara.tensor.random",
+    "aesara.tensor.signal",
+    "aesara.typed_list",
+    "bin",
+]
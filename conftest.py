@@ -20,6 +20,11 @@ def pytest_addoption(parser):
 
 def pytest_configure(config):
     config.addinivalue_line("markers", "slow: mark test as slow to run")
+    config.addinivalue_line(
+        "markers",
+        "xdist_group(name): group tests on one pytest-xdist worker so that "
+        "they can share per-process caches",
+    )
 
 
 def pytest_collection_modifyitems(config, items):
@@ -1,14 +1,21 @@
 #!/usr/bin/env python
+import os
+import runpy
 import sys
+from pathlib import Path
 
-from setuptools import find_packages, setup
+from setuptools import setup
 
 import versioneer
 
 
-def read_file(filename):
-    with open(filename, "rt") as buff:
-        return buff.read()
+# The package list is committed as a static, generated module (see
+# `tools/gen_packages.py`) so that building does not have to walk the whole
+# source tree with `setuptools.find_packages`.  It is loaded by path because
+# importing the `aesara` package would require its runtime dependencies.
+PACKAGES = runpy.run_path(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "aesara", "_packages.py")
+)["PACKAGES"]
 
 
 NAME = "aesara"
@@ -17,7 +24,6 @@ MAINTAINER_EMAIL = "aesara.devs@gmail.com"
 DESCRIPTION = (
     "Optimizing compiler for evaluating mathematical expressions on CPUs and GPUs."
 )
-LONG_DESCRIPTION = read_file("DESCRIPTION.txt")
 URL = "https://github.com/aesara-devs/aesara"
 LICENSE = "BSD"
 AUTHOR = "aesara-devs"
@@ -60,6 +66,10 @@ if sys.version_info[0:2] < (3, 7):
     install_requires += ["dataclasses"]
 
 if __name__ == "__main__":
+    # Only read the long description when actually building or installing;
+    # introspection commands such as `setup.py --version` do not need it.
+    LONG_DESCRIPTION = Path("DESCRIPTION.txt").read_text(encoding="utf-8")
+
     setup(
         name=NAME,
         version=versioneer.get_version(),
@@ -72,7 +82,7 @@ if __name__ == "__main__":
         url=URL,
         license=LICENSE,
         platforms=PLATFORMS,
-        packages=find_packages(exclude=["tests", "tests.*"]),
+        packages=PACKAGES,
         install_requires=install_requires,
         package_data={
             "": [
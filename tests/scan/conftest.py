@@ -0,0 +1,58 @@
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from aesara.configdefaults import config
+
+
+class RefValueCache:
+    """Persistent cache of reference outputs for optimization tests.
+
+    Several tests in this directory compile a function a second time, with
+    the optimization under test disabled, solely to obtain numerical
+    reference values.  Routing that computation through `get` persists the
+    reference outputs (together with the inputs that produced them) across
+    test runs, so the unoptimized compilation only happens the first time
+    or after the cache file is removed.
+
+    Set ``AESARA_TEST_FULL=1`` in the environment to ignore the stored
+    values and recompute every reference from scratch.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._store = {}
+        if os.environ.get("AESARA_TEST_FULL", "") != "1" and path.exists():
+            try:
+                with open(path, "rb") as f:
+                    self._store = pickle.load(f)
+            except Exception:
+                self._store = {}
+
+    def get(self, key, make_inputs, compute_ref):
+        """Return a cached ``(inputs, reference outputs)`` pair for `key`.
+
+        On a cache miss, the inputs are created with `make_inputs` and the
+        reference outputs are computed as ``compute_ref(*inputs)``; both are
+        stored so that later runs replay the exact same comparison without
+        invoking `compute_ref` (or compiling whatever it depends on) again.
+        """
+        if key not in self._store:
+            # copy the inputs: the makers may hand out shared scratch
+            # buffers, and the store must own its arrays
+            inputs = tuple(np.array(value) for value in make_inputs())
+            self._store[key] = (inputs, compute_ref(*inputs))
+            with open(self._path, "wb") as f:
+                pickle.dump(self._store, f)
+        return self._store[key]
+
+
+@pytest.fixture(scope="session")
+def ref_cache():
+    # The reference values depend on the configured float type, so each
+    # floatX setting gets its own cache file.
+    path = Path(__file__).parent / f"_ref_values_{config.floatX}.pkl"
+    return RefValueCache(path)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""Regenerate the static package list in ``aesara/_packages.py``.
+
+``setup.py`` reads the static list instead of calling
+``setuptools.find_packages``, which walks the entire source tree on every
+build.  Run this script from anywhere whenever a package is added, removed
+or renamed, or with ``--check`` to verify that the committed list is still
+in sync with the source tree.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from setuptools import find_packages
+
+
+HEADER = '''"""Static list of the packages shipped by the ``aesara`` distribution.
+
+Generated by ``tools/gen_packages.py``; do not edit by hand.
+"""
+
+'''
+
+
+def generate(root):
+    packages = sorted(find_packages(where=str(root), exclude=["tests", "tests.*"]))
+    lines = [HEADER, "PACKAGES = [\n"]
+    lines.extend(f'    "{package}",\n' for package in packages)
+    lines.append("]\n")
+    return "".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="do not write anything; exit non-zero if the committed list "
+        "differs from the current source tree",
+    )
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parent.parent
+    target = root / "aesara" / "_packages.py"
+    content = generate(root)
+
+    if args.check:
+        if not target.exists() or target.read_text() != content:
+            print(
+                f"{target} is out of date; regenerate it with "
+                "`python tools/gen_packages.py`",
+                file=sys.stderr,
+            )
+            return 1
+        return 0
+
+    target.write_text(content)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())